@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+
+import sys
+import click
+
+from ..utils import console, list_project_files
+
+@click.command()
+@click.option('--no-upload', is_flag=True, help="Build the Docker image locally without uploading.")
+def build(no_upload):
+    """Build the Docker image and prepare for deployment."""
+    console.print("[bold blue]🔨 Building project...[/bold blue]")
+    rc = run_build(no_upload)
+    if rc != 0:
+        sys.exit(rc)
+
+def run_build(no_upload=False):
+    """Run redeploy.sh, streaming its logs, and return its exit code."""
+    import subprocess
+
+    present = list_project_files()
+    if "iot-ota.yaml" not in present:
+        console.print("[red]Error: Not in an IoT OTA project directory. Run 'iot-ota init' first.[/red]")
+        return 1
+
+    script_to_run = "./redeploy.sh"
+    if "redeploy.sh" not in present:
+        console.print(f"[red]Error: {script_to_run} not found. Run 'iot-ota init' first.[/red]")
+        return 1
+
+    command = [script_to_run]
+    if no_upload:
+        command.append("--no-upload")
+
+    try:
+        # Use Popen to stream output in real-time
+        process = subprocess.Popen(
+            command, 
+            stdout=subprocess.PIPE, 
+            stderr=subprocess.STDOUT, 
+            text=True, 
+            bufsize=1,
+            cwd="."
+        )
+
+        # Read and print output line by line
+        console.print("[cyan]-- Build logs --[/cyan]")
+        for line in process.stdout:
+            # Docker and shell output may contain "[...]", so don't parse it as markup
+            console.print(line.rstrip(), style="dim", markup=False)
+        
+        rc = process.wait()
+        console.print("[cyan]-- End build logs --[/cyan]")
+
+        if rc == 0:
+            console.print(f"[bold green]✅ Build successful![/bold green]")
+        else:
+            console.print(f"[red]Build failed (return code: {rc}). See logs above for details.[/red]")
+        return rc
+                
+    except Exception as e:
+        console.print(f"[red]Error during build process: {e}[/red]")
+        return 1
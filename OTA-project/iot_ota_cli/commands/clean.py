@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+
+import os
+import click
+
+from ..utils import console
+
+# Build artifacts (*.tar, *.tar.zst, *.sig, *.sha256) are always cleaned
+TEMPORARY_SUFFIXES = (".tar", ".tar.zst", ".sig", ".sha256")
+TEMPORARY_FILES = frozenset({"setup_devices.yaml", "provision_devices.yaml", "cron_manage.yaml"})
+# Additionally removed by --full
+GENERATED_FILES = frozenset({
+    "iot-ota.yaml", "inventory.yaml", "Dockerfile",
+    "edge_deploy.sh", "redeploy.sh", "ota_poll.sh", "ota_private.pem",
+    "ota_public.pem", "version.yaml",
+    "iot-ota.yaml.json", "inventory.yaml.json"
+})
+
+@click.command()
+@click.option('--full', is_flag=True, help="Remove all generated project files, not just temporary ones.")
+def clean(full):
+    """Clean up temporary or all generated files."""
+    from rich.text import Text
+
+    if full:
+        console.print("[bold red]🧹 Performing full clean...[/bold red]")
+        files_to_clean = TEMPORARY_FILES | GENERATED_FILES
+    else:
+        console.print("[bold yellow]🧹 Cleaning temporary files...[/bold yellow]")
+        files_to_clean = TEMPORARY_FILES
+
+    # Match every name in a single directory listing rather than globbing per pattern
+    with os.scandir(".") as entries:
+        matches = sorted(
+            entry.name for entry in entries
+            if (entry.name in files_to_clean
+                or (entry.name.endswith(TEMPORARY_SUFFIXES) and not entry.name.startswith(".")))
+            and not entry.is_dir(follow_symlinks=False)
+        )
+
+    cleaned_files = []
+    for file in matches:
+        try:
+            os.remove(file)
+            cleaned_files.append(file)
+        except Exception as e:
+            console.print(f"[red]Failed to remove {file}: {e}[/red]")
+    
+    if cleaned_files:
+        console.print(f"[green]✅ Cleaned up {len(cleaned_files)} files:[/green]")
+        for file in cleaned_files:
+            # Build the line directly rather than having rich parse markup for every file
+            console.print(Text("  - ").append(file, style="dim"))
+    else:
+        console.print("[yellow]No generated files to clean.[/yellow]")
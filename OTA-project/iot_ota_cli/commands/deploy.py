@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+
+import sys
+import click
+
+from ..utils import console, list_project_files, run_setup_playbook
+from .build import run_build
+
+# Files deploy-only needs from a previous init (ota_poll.sh is generated if missing)
+DEPLOY_REQUIRED_FILES = ("iot-ota.yaml", "edge_deploy.sh", "ota_public.pem")
+
+@click.command()
+def trigger():
+    """Trigger an update check on all devices without building a new version."""
+    console.print("[bold blue]📡 Triggering update on all devices...[/bold blue]")
+    rc = run_setup_playbook()
+    if rc != 0:
+        sys.exit(rc)
+    console.print("[bold green]✅ Update trigger signal sent successfully![/bold green]")
+    console.print("[dim]Devices will now check S3 for the latest version.[/dim]")
+
+@click.command()
+def deploy():
+    """A full workflow: build, upload, and deploy to all devices."""
+    console.print("[bold green]🚀 Starting full deployment cycle...[/bold green]")
+    
+    # Step 1: Build and Upload
+    console.print("\n[cyan]Step 1: Building project and uploading to S3...[/cyan]")
+    rc = run_build(no_upload=False)
+    if rc != 0:
+        console.print("[red]Build step failed. Aborting deployment.[/red]")
+        sys.exit(rc)
+    
+    # Step 2: Trigger update on devices
+    console.print("\n[cyan]Step 2: Triggering update on all devices...[/cyan]")
+    rc = run_setup_playbook()
+    if rc != 0:
+        console.print("[red]Device deployment step failed.[/red]")
+        sys.exit(rc)
+    
+    console.print("\n[bold green]🎉 Full deployment cycle complete![/bold green]")
+
+@click.command()
+def deploy_only():
+    """Deploy existing build to all devices without rebuilding."""
+    console.print("[bold blue]📡 Deploying existing build to all devices...[/bold blue]")
+    
+    # Check if we have the necessary files
+    present = list_project_files()
+    missing_files = [f for f in DEPLOY_REQUIRED_FILES if f not in present]
+    
+    if missing_files:
+        console.print(f"[red]Error: Missing required files: {', '.join(missing_files)}[/red]")
+        console.print("[yellow]Run 'iot-ota init' first, or 'iot-ota build' to create deployment artifacts.[/yellow]")
+        sys.exit(1)
+    
+    # Check if we have a version.yaml (indicates a build has been done)
+    if "version.yaml" not in present:
+        console.print("[red]Error: No version.yaml found. You need to build first.[/red]")
+        console.print("[yellow]Run 'iot-ota build' to create a version before deploying.[/yellow]")
+        sys.exit(1)
+    
+    rc = run_setup_playbook()
+    if rc != 0:
+        sys.exit(rc)
+    console.print("[bold green]✅ Deploy-only operation successful![/bold green]")
+    console.print("[dim]Devices have been notified to check for the latest version.[/dim]")
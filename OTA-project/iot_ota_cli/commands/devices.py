@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+
+import sys
+import click
+from pathlib import Path
+
+from ..utils import console, yaml_load, load_inventory, save_inventory, run_setup_playbook, _run_ansible_playbook, PLAYBOOK_DIR
+
+# Static playbooks, run straight from the package
+CRON_ENABLE_PLAYBOOK = str(PLAYBOOK_DIR / "cron_enable.yaml")
+CRON_DISABLE_PLAYBOOK = str(PLAYBOOK_DIR / "cron_disable.yaml")
+CRON_STATUS_PLAYBOOK = str(PLAYBOOK_DIR / "cron_status.yaml")
+PROVISIONING_PLAYBOOK = str(PLAYBOOK_DIR / "provision_devices.yaml")
+
+@click.group()
+def devices():
+    """Manage edge devices in the Ansible inventory."""
+    pass
+
+@devices.command("add")
+def devices_add():
+    """Add a new edge device to the inventory."""
+    from rich.prompt import Prompt
+
+    console.print("[bold green]📱 Adding new edge device[/bold green]")
+    
+    device_info = {
+        "name": Prompt.ask("Device name (e.g., living-room-pi)"),
+        "host": Prompt.ask("Device IP or hostname"),
+        "user": Prompt.ask("SSH username", default="pi"),
+        "port": int(Prompt.ask("SSH port", default="22")),
+    }
+    
+    inventory = load_inventory()
+    
+    if "edge_devices" not in inventory:
+        inventory["edge_devices"] = {"hosts": {}}
+    
+    inventory["edge_devices"]["hosts"][device_info["name"]] = {
+        "ansible_host": device_info["host"],
+        "ansible_user": device_info["user"],
+        "ansible_port": device_info["port"],
+    }
+    
+    save_inventory(inventory)
+    console.print(f"[green]✅ Device '[bold]{device_info['name']}[/bold]' added successfully![/green]")
+
+@devices.command("bulk-setup")
+@click.option('--file', '-f', default='devices.yaml', help="Path to devices configuration file")
+@click.option('--forks', type=click.IntRange(min=1), help="Number of devices to provision at once")
+@click.option('--per-host', is_flag=True, help="Run a separate Ansible process for each device")
+def devices_bulk_setup(file, forks, per_host):
+    """Add and provision multiple devices from a configuration file."""
+    from rich.prompt import Prompt
+
+    console.print("[bold green]📱 Bulk adding and provisioning devices[/bold green]")
+    
+    config_file = Path(file)
+    if not config_file.exists():
+        console.print(f"[red]Error: Configuration file '{file}' not found.[/red]")
+        console.print("[yellow]Create a file with device configurations. Example:[/yellow]")
+        show_devices_config_example()
+        sys.exit(1)
+    
+    try:
+        with open(config_file, 'r') as f:
+            if file.endswith('.yaml') or file.endswith('.yml'):
+                devices_config = yaml_load(f)
+            else:
+                # Support JSON format as well
+                import json
+                devices_config = json.load(f)
+    except Exception as e:
+        console.print(f"[red]Error reading configuration file: {e}[/red]")
+        sys.exit(1)
+    
+    if not validate_devices_config(devices_config):
+        sys.exit(1)
+    
+    # Add all devices to inventory
+    new_hosts = {
+        device_name: {
+            "ansible_host": device_config["host"],
+            "ansible_user": device_config.get("user", "pi"),
+            "ansible_port": device_config.get("port", 22),
+        }
+        for device_name, device_config in devices_config.get("devices", {}).items()
+    }
+    for device_name in new_hosts:
+        console.print(f"[cyan]Adding device: {device_name}[/cyan]")
+    
+    inventory = load_inventory()
+    inventory.setdefault("edge_devices", {}).setdefault("hosts", {}).update(new_hosts)
+    added_devices = list(new_hosts)
+    
+    save_inventory(inventory)
+    console.print(f"[green]✅ Added {len(added_devices)} devices to inventory[/green]")
+    
+    # Provision all devices
+    console.print("\n[bold yellow]🔑 Provisioning SSH keys for all devices...[/bold yellow]")
+    
+    public_key_path = Path.home() / ".ssh" / "id_rsa.pub"
+    if not public_key_path.exists():
+        console.print(f"[red]Error: Public SSH key not found at {public_key_path}[/red]")
+        console.print("Please generate one using 'ssh-keygen -t rsa -b 4096'")
+        sys.exit(1)
+    
+    # Ask for a single password for all devices
+    password = Prompt.ask("Enter the SSH password for all devices", password=True)
+    
+    success = _run_ansible_playbook(PROVISIONING_PLAYBOOK, extra_vars={"ansible_ssh_pass": password},
+                                    forks=forks, per_host=per_host)
+    
+    if success:
+        console.print("[bold green]✅ Bulk setup and provisioning successful![/bold green]")
+        console.print(f"[cyan]Added and provisioned {len(added_devices)} devices:[/cyan]")
+        for device in added_devices:
+            console.print(f"  - {device}", markup=False)
+        
+        console.print("\n[cyan]Next steps:[/cyan]")
+        console.print("  1. Run 'iot-ota devices setup' to deploy OTA agents")
+        console.print("  2. Run 'iot-ota build' and 'iot-ota deploy' to start deployments")
+
+def show_devices_config_example():
+    """Show example configuration file format."""
+    example_yaml = """devices:
+  living-room-pi:
+    host: 192.168.1.100
+    user: pi
+    port: 22
+  
+  kitchen-pi:
+    host: 192.168.1.101
+    user: pi
+    port: 22
+    
+  bedroom-pi:
+    host: 192.168.1.102
+    user: ubuntu
+    port: 2222
+
+# Optional global defaults
+defaults:
+  user: pi
+  port: 22
+"""
+    
+    console.print("\n[cyan]Example devices.yaml:[/cyan]")
+    console.print(example_yaml)
+
+def validate_devices_config(config):
+    """Validate the devices configuration format."""
+    if not isinstance(config, dict):
+        console.print("[red]Error: Configuration must be a dictionary/object[/red]")
+        return False
+    
+    if "devices" not in config:
+        console.print("[red]Error: Configuration must have a 'devices' section[/red]")
+        return False
+    
+    devices = config["devices"]
+    if not isinstance(devices, dict):
+        console.print("[red]Error: 'devices' section must be a dictionary[/red]")
+        return False
+    
+    defaults = config.get("defaults", {})
+    default_user = defaults.get("user", "pi")
+    default_port = defaults.get("port", 22)
+    
+    for device_name, device_config in devices.items():
+        if not isinstance(device_config, dict):
+            console.print(f"[red]Error: Device '{device_name}' configuration must be a dictionary[/red]")
+            return False
+        
+        # Check required fields
+        if "host" not in device_config:
+            console.print(f"[red]Error: Device '{device_name}' missing required 'host' field[/red]")
+            return False
+        
+        # Apply defaults
+        device_config.setdefault("user", default_user)
+        device_config.setdefault("port", default_port)
+    
+    return True
+
+@devices.command("list")
+def devices_list():
+    """List all configured edge devices."""
+    from rich.table import Table
+    from rich.text import Text
+
+    inventory = load_inventory()
+    
+    if not inventory.get("edge_devices", {}).get("hosts"):
+        console.print("[yellow]No devices configured. Use 'iot-ota devices add' or 'iot-ota devices bulk-setup' to add devices.[/yellow]")
+        return
+    
+    table = Table(title="Configured Edge Devices")
+    table.add_column("Name", style="cyan", no_wrap=True)
+    table.add_column("Host", style="green")
+    table.add_column("User", style="yellow")
+    table.add_column("Port", style="blue")
+    
+    for name, details in inventory["edge_devices"]["hosts"].items():
+        # Text cells are rendered as-is, without a markup parse per cell
+        table.add_row(
+            Text(str(name)),
+            Text(str(details.get("ansible_host", "N/A"))),
+            Text(str(details.get("ansible_user", "N/A"))),
+            Text(str(details.get("ansible_port", "N/A")))
+        )
+    
+    console.print(table)
+
+@devices.command("remove")
+@click.argument('device_name', required=False)
+def devices_remove(device_name):
+    """Remove an edge device from the inventory."""
+    from rich.prompt import Confirm
+
+    inventory = load_inventory()
+    
+    if not inventory.get("edge_devices", {}).get("hosts"):
+        console.print("[yellow]No devices to remove.[/yellow]")
+        return
+    
+    hosts = inventory["edge_devices"]["hosts"]
+    
+    if not device_name:
+        # Only the interactive menu needs the names in indexable order
+        device_names = list(hosts)
+        console.print("[cyan]Available devices:[/cyan]")
+        for i, name in enumerate(device_names, 1):
+            console.print(f"  {i}. {name}", markup=False)
+        
+        choice = click.prompt("Select device to remove", type=click.IntRange(1, len(device_names)))
+        device_name = device_names[choice - 1]
+    
+    if device_name not in hosts:
+        console.print(f"[red]Error: Device '{device_name}' not found.[/red]")
+        sys.exit(1)
+
+    if Confirm.ask(f"Are you sure you want to remove device '[bold]{device_name}[/bold]'?"):
+        del hosts[device_name]
+        save_inventory(inventory)
+        console.print(f"[green]✅ Device '{device_name}' removed successfully![/green]")
+
+@devices.command("provision")
+def devices_provision():
+    """Set up passwordless SSH access by copying your public key to devices."""
+    from rich.prompt import Prompt
+
+    console.print("[bold yellow]🔑 Provisioning devices for passwordless SSH access...[/bold yellow]")
+    
+    public_key_path = Path.home() / ".ssh" / "id_rsa.pub"
+    if not public_key_path.exists():
+        console.print(f"[red]Error: Public SSH key not found at {public_key_path}[/red]")
+        console.print("Please generate one using 'ssh-keygen -t rsa -b 4096'")
+        sys.exit(1)
+
+    password = Prompt.ask("Enter the SSH password for your devices", password=True)
+    
+    success = _run_ansible_playbook(PROVISIONING_PLAYBOOK, extra_vars={"ansible_ssh_pass": password})
+    
+    if success:
+        console.print("[bold green]✅ Provisioning successful! You can now connect without a password.[/bold green]")
+
+@devices.command("setup")
+def devices_setup():
+    """Deploy initial OTA agent to devices for the first time."""
+    console.print("[bold blue]🛰️  Performing first-time setup for devices...[/bold blue]")
+    rc = run_setup_playbook()
+    if rc != 0:
+        sys.exit(rc)
+    console.print("[bold green]✅ Device setup and initial deployment successful![/bold green]")
+
+@devices.command("cron")
+@click.argument('action', type=click.Choice(['enable', 'disable', 'status']))
+def devices_cron(action):
+    """Manage automatic update cron jobs on devices."""
+    if action == "enable":
+        console.print("[bold yellow]🕐 Enabling automatic update cron jobs...[/bold yellow]")
+        success = _run_ansible_playbook(CRON_ENABLE_PLAYBOOK)
+        if success:
+            console.print("[bold green]✅ Cron jobs enabled! Devices will check for updates every minute after a new version, backing off to hourly while nothing changes.[/bold green]")
+    
+    elif action == "disable":
+        console.print("[bold yellow]🕐 Disabling automatic update cron jobs...[/bold yellow]")
+        success = _run_ansible_playbook(CRON_DISABLE_PLAYBOOK)
+        if success:
+            console.print("[bold green]✅ Cron jobs disabled.[/bold green]")
+    
+    elif action == "status":
+        console.print("[bold blue]🕐 Checking cron job status...[/bold blue]")
+        success = _run_ansible_playbook(CRON_STATUS_PLAYBOOK)
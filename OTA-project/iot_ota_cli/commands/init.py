@@ -0,0 +1,631 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import click
+from pathlib import Path
+
+from ..utils import console, save_yaml
+
+# Source file suffixes recognised for each supported language
+PROGRAM_SUFFIXES = {
+    "cpp": (".cpp", ".cc", ".cxx"),
+    "c": (".c",),
+    "python": (".py",),
+    "java": (".java", ".jar")
+}
+# Extension used for the suggested program file name
+DEFAULT_EXTENSIONS = {"cpp": ".cpp", "c": ".c", "python": ".py", "java": ".jar"}
+# Docker buildx platform for each supported edge device
+PLATFORMS = {
+    "rpi3b": "linux/arm/v7",
+    "jetsonnano": "linux/arm64",
+    "jetsonorin": "linux/arm64",
+    "x86_64": "linux/amd64"
+}
+
+DOCKER_IMAGE_TAG = "1.0"
+PRIVATE_KEY = "ota_private.pem"
+PUBLIC_KEY = "ota_public.pem"
+VERSION_FILE = "version.yaml"
+VERSION_SIG = "version.yaml.sig"
+# Keeps the signing keys, build artifacts and CLI files out of the image, and
+# stops files that change on every build from invalidating the COPY layers
+DOCKERIGNORE = """.git
+ota_private.pem
+ota_public.pem
+*.tar
+*.tar.zst
+*.sig
+*.sha256
+version.yaml
+iot-ota.yaml
+iot-ota.yaml.json
+inventory.yaml
+inventory.yaml.json
+setup_devices.yaml
+edge_deploy.sh
+redeploy.sh
+ota_poll.sh
+"""
+# Seconds between update checks on a device: the poll interval starts at the
+# minimum after an update and doubles on every check that finds nothing new
+POLL_MIN_INTERVAL = 60
+POLL_MAX_INTERVAL = 3600
+
+def get_program_files_by_language(language):
+    """Get a list of program files in the current directory based on language."""
+    suffixes = PROGRAM_SUFFIXES.get(language, ())
+    
+    # One directory listing instead of a glob per pattern; like glob, skip dotfiles
+    with os.scandir(".") as entries:
+        files = [
+            entry.name for entry in entries
+            if entry.name.endswith(suffixes) and not entry.name.startswith(".") and entry.is_file()
+        ]
+    
+    return sorted(files)
+
+def get_program_file_basename(program_file):
+    """Get the basename for the program file, without its extension."""
+    return program_file.rsplit(".", 1)[0] if "." in program_file else program_file
+
+@click.command()
+def init():
+    """Initialize a new IoT OTA project in the current directory."""
+    from rich.prompt import Prompt, Confirm
+
+    console.print("[bold green]🚀 Initializing IoT OTA Project[/bold green]")
+    
+    if Path("iot-ota.yaml").exists():
+        if not Confirm.ask("[yellow]Project already initialized. Overwrite configuration?"):
+            console.print("[red]Initialization cancelled.[/red]")
+            return
+    
+    project_config = {}
+    
+    # --- Collect Project Information ---
+    languages = ["cpp", "c", "python", "java"]
+    project_config["language"] = Prompt.ask(
+        "Select programming language", 
+        choices=languages, 
+        default="python"
+    )
+    
+    if project_config["language"] in ["c", "cpp"]:
+        project_config["additional_packages"] = Prompt.ask(
+            "Enter any additional APT packages to install (space-separated, e.g., libcpr-dev)",
+            default=""
+        )
+    else:
+        project_config["additional_packages"] = ""
+
+    available_files = get_program_files_by_language(project_config["language"])
+    
+    if available_files:
+        console.print(f"\n[cyan]Available {project_config['language']} files in this directory:[/cyan]")
+        for i, file in enumerate(available_files, 1):
+            console.print(f"  {i}. {file}", markup=False)
+        console.print(f"  {len(available_files) + 1}. <Enter custom filename>")
+        
+        choice = click.prompt(
+            "Select your main program file",
+            type=click.IntRange(1, len(available_files) + 1),
+            default=1
+        )
+        
+        if choice <= len(available_files):
+            project_config["program_file"] = available_files[choice - 1]
+        else:
+            suggested_name = f"main{DEFAULT_EXTENSIONS.get(project_config['language'], '')}"
+            project_config["program_file"] = Prompt.ask(
+                "Enter your main program filename",
+                default=suggested_name
+            )
+    else:
+        suggested_name = f"main{DEFAULT_EXTENSIONS.get(project_config['language'], '')}"
+        console.print(f"[yellow]No {project_config['language']} files found. Please provide a filename.[/yellow]")
+        project_config["program_file"] = Prompt.ask(
+            "Enter your main program filename",
+            default=suggested_name
+        )
+
+    devices = ["rpi3b", "jetsonnano", "jetsonorin", "x86_64"]
+    project_config["edge_device"] = Prompt.ask(
+        "Select target edge device", 
+        choices=devices, 
+        default="rpi3b"
+    )
+    
+    project_config["s3_bucket"] = Prompt.ask(
+        "Enter S3 bucket name for updates",
+        default="iot-ota-rtupdate"
+    )
+    
+    project_config["mqtt_broker"] = Prompt.ask(
+        "Enter an MQTT broker host to notify devices of new versions (leave empty to rely on polling)",
+        default=""
+    )
+    
+    # --- Create Project Config ---
+    project_config["version"] = "1.0.0"
+    project_config["docker_image_tag"] = "1.0"
+    project_config["program_basename"] = get_program_file_basename(project_config["program_file"]).lower()
+    # Recorded so the S3 prefix and device directory survive renaming the project directory
+    project_config["project_dir_name"] = os.path.basename(os.getcwd())
+    
+    save_yaml("iot-ota.yaml", project_config)
+    
+    # --- Generate the project files ---
+    console.print("\n[yellow]Generating project files...[/yellow]")
+    run_init_script(project_config)
+    
+    console.print("\n[bold green]✅ Project initialized successfully![/bold green]")
+    console.print(f"[cyan]Project config saved to: [bold]iot-ota.yaml[/bold][/cyan]")
+    console.print(f"[cyan]Next steps:[/cyan]")
+    console.print(f"  1. Configure your devices: [bold]iot-ota devices add[/bold] or [bold]iot-ota devices bulk-setup[/bold]")
+    console.print(f"  2. Provision devices for passwordless access: [bold]iot-ota devices provision[/bold]")
+    console.print(f"  3. Run first-time agent setup: [bold]iot-ota devices setup[/bold]")
+    console.print(f"  4. Build and deploy updates: [bold]iot-ota deploy[/bold]")
+
+def run_init_script(project_config):
+    """Generates the Dockerfile, signing keys and deployment scripts for the project."""
+    from rich.progress import Progress, SpinnerColumn, TextColumn
+
+    program_file = project_config["program_file"]
+    platform = PLATFORMS[project_config["edge_device"]]
+    basename = os.path.splitext(os.path.basename(program_file))[0]
+    image_name = f"{basename}:{DOCKER_IMAGE_TAG}"
+    s3_bucket = project_config["s3_bucket"]
+    directory_name = project_config["project_dir_name"]
+    mqtt_broker = project_config.get("mqtt_broker", "")
+    mqtt_topic = _mqtt_topic(directory_name)
+
+    try:
+        with Progress(
+            SpinnerColumn(),
+            TextColumn("[progress.description]{task.description}"),
+        ) as progress:
+            task = progress.add_task("Generating Dockerfile, keys, and scripts...", total=None)
+
+            with open("Dockerfile", "w") as f:
+                f.write(_render_dockerfile(
+                    project_config["language"], platform, program_file, basename,
+                    project_config.get("additional_packages", "")
+                ))
+            # Leave an existing .dockerignore to the user
+            if not Path(".dockerignore").exists():
+                Path(".dockerignore").write_text(DOCKERIGNORE)
+
+            if not Path(PRIVATE_KEY).exists():
+                _generate_signing_keys()
+
+            for script, content in (
+                ("edge_deploy.sh", _render_edge_deploy(s3_bucket, directory_name, basename, image_name)),
+                ("redeploy.sh", _render_redeploy(s3_bucket, directory_name, basename, image_name, platform,
+                                                 mqtt_broker, mqtt_topic)),
+                ("ota_poll.sh", _render_ota_poll(mqtt_broker, mqtt_topic)),
+            ):
+                with open(script, "w") as f:
+                    f.write(content)
+                os.chmod(script, 0o755)
+
+            progress.update(task, description="✅ Project setup complete")
+
+    except Exception as e:
+        console.print(f"[red]An unexpected error occurred: {e}[/red]")
+        sys.exit(1)
+
+def _generate_signing_keys():
+    """Writes a new 2048-bit RSA key pair for signing updates, in the PEM layout openssl produces."""
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    private_pem = private_key.private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=serialization.NoEncryption()
+    )
+    public_pem = private_key.public_key().public_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+
+    # Keep the private key readable by its owner only
+    fd = os.open(PRIVATE_KEY, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "wb") as f:
+        f.write(private_pem)
+    Path(PUBLIC_KEY).write_bytes(public_pem)
+
+def _render_dockerfile(language, platform, program_file, basename, additional_packages):
+    """Returns the Dockerfile that builds and runs the program for the target platform."""
+    arch = "arm64v8" if platform == "linux/arm64" else "arm32v7"
+
+    if language in ("cpp", "c"):
+        compiler = "g++" if language == "cpp" else "gcc"
+        return f"""FROM {arch}/debian:bullseye-slim
+RUN apt-get update && apt-get install -y build-essential {additional_packages}
+WORKDIR /app
+COPY . /app
+RUN {compiler} "{program_file}" -o "{basename}"
+CMD ["./{basename}"]
+"""
+    if language == "python":
+        return f"""FROM {arch}/python:3.9-slim
+WORKDIR /app
+COPY requirements.txt* ./
+RUN pip install -r requirements.txt || true
+COPY . .
+CMD ["python", "-u", "{program_file}"]
+"""
+    if os.path.splitext(program_file)[1] == ".jar":
+        return f"""FROM {arch}/openjdk:11-jre-slim
+WORKDIR /app
+COPY "{program_file}" .
+CMD ["java", "-jar", "{program_file}"]
+"""
+    return f"""FROM {arch}/openjdk:11-jdk-slim AS builder
+WORKDIR /build
+COPY . .
+RUN javac "{program_file}" -d .
+
+FROM {arch}/openjdk:11-jre-slim
+WORKDIR /app
+COPY --from=builder "/build/{basename}.class" .
+CMD ["java", "{basename}"]
+"""
+
+def _render_edge_deploy(s3_bucket, directory_name, basename, image_name):
+    """Returns the script that runs on each device to fetch, verify and start new versions."""
+    return f"""#!/bin/bash
+set -e
+
+S3_BASE_URL="https://{s3_bucket}.s3.amazonaws.com/{directory_name}"
+WORKDIR="{directory_name}"
+PUBLIC_KEY="{PUBLIC_KEY}"
+CONTAINER_NAME="{basename}_ota_app"
+IMAGE_TAR="{basename}.tar.zst"
+VERSION_FILE="{VERSION_FILE}"
+VERSION_SIG="{VERSION_SIG}"
+IMAGE_NAME="{image_name}"
+
+mkdir -p "$WORKDIR"
+cd "$WORKDIR"
+
+# One run at a time: the poller and a setup or deploy push can start this
+# script together, and both would work on the same files and containers.
+# A second run waits, then usually finds the device already up to date.
+exec 8>".deploy.lock"
+if ! flock -n 8; then
+    echo "Another update is in progress; waiting for it to finish..."
+    flock 8
+fi
+
+# Sets VERSION_TS, VERSION_IMAGE_ID and VERSION_IMAGE_SHA256 from a version file. Parsed in bash
+# itself, since this runs on every poll.
+read_version_file() {{
+    local line
+    VERSION_TS=""
+    VERSION_IMAGE_ID=""
+    VERSION_IMAGE_SHA256=""
+    while IFS= read -r line || [ -n "$line" ]; do
+        case "$line" in
+            last_build:*) line="${{line#*\\"}}"; VERSION_TS="${{line%\\"*}}" ;;
+            image_id:*) line="${{line#*\\"}}"; VERSION_IMAGE_ID="${{line%\\"*}}" ;;
+            image_sha256:*) line="${{line#*\\"}}"; VERSION_IMAGE_SHA256="${{line%\\"*}}" ;;
+        esac
+    done < "$1"
+}}
+
+echo "Checking for updates..."
+LOCAL_VERSION_TS="1970-01-01T00:00:00Z"
+if [ -f "version.yaml" ]; then
+    read_version_file "version.yaml"
+    LOCAL_VERSION_TS="$VERSION_TS"
+fi
+
+# Download the remote version file to check its timestamp. Once a version has
+# been applied its ETag is kept, so an unchanged file comes back as an empty 304.
+ETAG_FILE=".version_etag"
+CURL_ARGS=(-sS -o remote_version.yaml -D remote_version.headers -w "%{{http_code}}")
+if [ -f "version.yaml" ] && [ -s "$ETAG_FILE" ]; then
+    CURL_ARGS+=(-H "If-None-Match: $(< "$ETAG_FILE")")
+fi
+HTTP_CODE=$(curl "${{CURL_ARGS[@]}}" "${{S3_BASE_URL}}/version.yaml") || HTTP_CODE="000"
+
+REMOTE_ETAG=""
+if [ "$HTTP_CODE" == "304" ]; then
+    REMOTE_VERSION_TS="$LOCAL_VERSION_TS"
+elif [ "$HTTP_CODE" == "200" ]; then
+    read_version_file remote_version.yaml
+    REMOTE_VERSION_TS="$VERSION_TS"
+    REMOTE_IMAGE_ID="$VERSION_IMAGE_ID"
+    REMOTE_IMAGE_SHA256="$VERSION_IMAGE_SHA256"
+    while IFS= read -r line; do
+        case "${{line,,}}" in
+            etag:*) REMOTE_ETAG="${{line#*: }}"; REMOTE_ETAG="${{REMOTE_ETAG%$'\\r'}}" ;;
+        esac
+    done < remote_version.headers
+else
+    echo "Could not download remote version file (HTTP $HTTP_CODE). Is the S3 object public?"
+    rm -f remote_version.yaml remote_version.headers
+    exit 1
+fi
+rm -f remote_version.headers
+
+if [ "$REMOTE_VERSION_TS" == "$LOCAL_VERSION_TS" ]; then
+    echo "Already up to date."
+    if [ -n "$REMOTE_ETAG" ]; then
+        echo "$REMOTE_ETAG" > "$ETAG_FILE"
+    fi
+    if [ -z "$(docker ps -q -f name="^/${{CONTAINER_NAME}}$")" ]; then
+      echo "Container is not running. Starting it..."
+      docker start $CONTAINER_NAME || echo "Failed to start container."
+    fi
+    rm -f remote_version.yaml
+    exit 0
+fi
+
+echo "New version found (${{REMOTE_VERSION_TS}}). Updating..."
+
+# --- Verify the version file ---
+if ! curl -fsS -o remote_version.yaml.sig "${{S3_BASE_URL}}/${{VERSION_SIG}}"; then
+    echo "ERROR: Failed to download the version file signature."
+    rm -f remote*
+    exit 1
+fi
+
+echo "Verifying version file signature..."
+if ! openssl dgst -sha256 -verify "${{PUBLIC_KEY}}" -signature remote_version.yaml.sig remote_version.yaml; then
+    echo "ERROR: Version file signature verification failed!"
+    rm -f remote*
+    exit 1
+fi
+echo "Version file signature OK."
+
+# The signed version file names the image it was built from. If that image is
+# still here from an earlier release (e.g. a rollback), skip the download.
+if [ -n "$REMOTE_IMAGE_ID" ] && docker image inspect "$REMOTE_IMAGE_ID" > /dev/null 2>&1; then
+    echo "Image ${{REMOTE_IMAGE_ID}} is already present, skipping download."
+    IMAGE_PRESENT=true
+else
+    IMAGE_PRESENT=false
+    if ! command -v zstd > /dev/null; then
+        echo "ERROR: zstd is needed to unpack updates. Install it with 'sudo apt-get install zstd'."
+        rm -f remote*
+        exit 1
+    fi
+
+    # The signed version file carries the image's SHA-256, so the image needs no
+    # signature of its own. It is hashed as it arrives, so checking it needs no
+    # second read from disk.
+    if [ -z "$REMOTE_IMAGE_SHA256" ]; then
+        echo "ERROR: The version file has no image_sha256. Rebuild it with the current iot-ota."
+        rm -f remote*
+        exit 1
+    fi
+    if ! IMAGE_SHA256=$(
+        set -o pipefail
+        curl -fsS "${{S3_BASE_URL}}/${{IMAGE_TAR}}" | tee "${{IMAGE_TAR}}" | openssl dgst -sha256 -r
+    ); then
+        echo "ERROR: Failed to download the image."
+        rm -f remote* *.zst
+        exit 1
+    fi
+    if [ "${{IMAGE_SHA256%% *}}" != "$REMOTE_IMAGE_SHA256" ]; then
+        echo "ERROR: Image checksum does not match the signed version file!"
+        rm -f remote* *.zst
+        exit 1
+    fi
+    echo "Image checksum OK."
+fi
+
+# --- Deploy ---
+if [ "$IMAGE_PRESENT" = true ]; then
+    docker tag "$REMOTE_IMAGE_ID" "${{IMAGE_NAME}}"
+else
+    echo "Loading new image..."
+    (
+        set -o pipefail
+        zstd -dc --long=27 "${{IMAGE_TAR}}" | docker load
+    )
+fi
+
+# Succeeds once the container passes its healthcheck or, if the image has
+# none, has stayed up for 5 seconds
+wait_until_up() {{
+    local status
+    for ((i = 1; i <= 30; i++)); do
+        sleep 1
+        status=$(docker inspect -f '{{{{if .State.Health}}}}{{{{.State.Health.Status}}}}{{{{else}}}}{{{{.State.Status}}}}{{{{end}}}}' "$1" 2>/dev/null)
+        case "$status" in
+            healthy) return 0 ;;
+            running) if [ "$i" -ge 5 ]; then return 0; fi ;;
+            starting) ;;
+            *) return 1 ;;
+        esac
+    done
+    return 1
+}}
+
+# Start the new version next to the old one and only swap them once it is up,
+# so the device keeps running the old version until then
+NEW_CONTAINER="${{CONTAINER_NAME}}_new"
+OLD_CONTAINER="${{CONTAINER_NAME}}_old"
+OLD_RUNNING=$(docker ps -q -f name="^/${{CONTAINER_NAME}}$")
+docker rm -f "$NEW_CONTAINER" > /dev/null 2>&1 || true
+
+echo "Starting new container..."
+docker run -d --name "$NEW_CONTAINER" --restart always "${{IMAGE_NAME}}"
+STARTED=true
+if ! wait_until_up "$NEW_CONTAINER"; then
+    STARTED=false
+    if [ -n "$OLD_RUNNING" ]; then
+        # The app may need something only one copy can hold, like a port or a device
+        echo "New container did not come up alongside the old one. Retrying with the old one stopped..."
+        docker rm -f "$NEW_CONTAINER" > /dev/null
+        docker stop "$CONTAINER_NAME" > /dev/null || true
+        docker run -d --name "$NEW_CONTAINER" --restart always "${{IMAGE_NAME}}"
+        if wait_until_up "$NEW_CONTAINER"; then
+            STARTED=true
+        fi
+    fi
+fi
+if [ "$STARTED" = false ]; then
+    echo "ERROR: New container failed to start. Keeping the previous version."
+    docker rm -f "$NEW_CONTAINER" > /dev/null || true
+    if [ -n "$OLD_RUNNING" ]; then
+        docker start "$CONTAINER_NAME" > /dev/null || true
+    fi
+    rm -f remote* *.zst *.sig *.sha256
+    exit 1
+fi
+
+echo "Switching to the new container..."
+if [ -n "$(docker ps -a -q -f name="^/${{CONTAINER_NAME}}$")" ]; then
+    docker rm -f "$OLD_CONTAINER" > /dev/null 2>&1 || true
+    docker rename "$CONTAINER_NAME" "$OLD_CONTAINER"
+    docker stop "$OLD_CONTAINER" > /dev/null || true
+    docker rm "$OLD_CONTAINER" > /dev/null || true
+fi
+docker rename "$NEW_CONTAINER" "$CONTAINER_NAME"
+
+mv remote_version.yaml version.yaml
+if [ -n "$REMOTE_ETAG" ]; then
+    echo "$REMOTE_ETAG" > "$ETAG_FILE"
+fi
+rm -f *.tar *.zst *.sig *.sha256
+echo "Update successful."
+cd ..
+"""
+
+def _mqtt_topic(directory_name):
+    """Returns the MQTT topic new versions of a project are announced on."""
+    return f"iot-ota/{directory_name}"
+
+def _render_ota_poll(mqtt_broker, mqtt_topic):
+    """Returns the script that keeps running edge_deploy.sh on a device, backing off while nothing changes."""
+    if mqtt_broker:
+        wait_step = f"""    # Wait out the delay, but wake up as soon as a new version is announced
+    START=$SECONDS
+    if ! mosquitto_sub -h "{mqtt_broker}" -t "{mqtt_topic}" -C 1 -W "$DELAY" > /dev/null 2>&1 9>&-; then
+        # Timed out, or mosquitto_sub or the broker is unavailable: sleep off the rest
+        REMAINING=$((DELAY - (SECONDS - START)))
+        if [ "$REMAINING" -gt 0 ]; then
+            sleep "$REMAINING" 9>&-
+        fi
+    fi"""
+    else:
+        wait_step = '    sleep "$DELAY" 9>&-'
+    return f"""#!/bin/bash
+# Started every minute by cron; the lock keeps a single copy running.
+# Everything this script starts gets fd 9 closed (9>&-), so once the script
+# itself is killed the lock is free even while a child is still running.
+exec 9>"$HOME/.ota_poll.lock"
+flock -n 9 || exit 0
+
+MIN_INTERVAL={POLL_MIN_INTERVAL}
+MAX_INTERVAL={POLL_MAX_INTERVAL}
+STATE_FILE="$HOME/.ota_state"
+LOG_FILE="$HOME/ota_update.log"
+
+MISS_COUNT=0
+if [ -f "$STATE_FILE" ]; then
+    read -r MISS_COUNT < "$STATE_FILE" || MISS_COUNT=0
+fi
+
+NEXT_LOG_TRIM=0
+while true; do
+    # Once a day, cut the log cron sends our output to down to its last 1000
+    # lines. It is rewritten in place because our stdout still has it open.
+    if [ "$SECONDS" -ge "$NEXT_LOG_TRIM" ]; then
+        if [ -f "$LOG_FILE" ]; then
+            tail -n 1000 "$LOG_FILE" > "$LOG_FILE.tmp" 9>&- && cat "$LOG_FILE.tmp" > "$LOG_FILE" 9>&-
+            rm -f "$LOG_FILE.tmp"
+        fi
+        NEXT_LOG_TRIM=$((SECONDS + 86400))
+    fi
+
+    OUTPUT=$(cd ~ && ./edge_deploy.sh 2>&1 9>&-)
+    echo "$OUTPUT"
+    if [[ "$OUTPUT" == *"Update successful."* ]]; then
+        MISS_COUNT=0
+    elif [ "$MISS_COUNT" -lt 16 ]; then
+        MISS_COUNT=$((MISS_COUNT + 1))
+    fi
+    echo "$MISS_COUNT" > "$STATE_FILE"
+
+    # Double the wait for every check that found nothing new, up to the maximum,
+    # with +/-20% jitter so a fleet doesn't poll in lockstep
+    DELAY=$((MIN_INTERVAL << MISS_COUNT))
+    if [ "$MISS_COUNT" -ge 16 ] || [ "$DELAY" -gt "$MAX_INTERVAL" ]; then
+        DELAY=$MAX_INTERVAL
+    fi
+    DELAY=$((DELAY * (80 + RANDOM % 41) / 100))
+{wait_step}
+done
+"""
+
+def _render_redeploy(s3_bucket, directory_name, basename, image_name, platform, mqtt_broker, mqtt_topic):
+    """Returns the script that builds, signs and uploads a new version from this machine."""
+    image_tar = f"{basename}.tar.zst"
+    s3_prefix = f"s3://{s3_bucket}/{directory_name}"
+    notify_step = ""
+    if mqtt_broker:
+        notify_step = f"""
+echo "Notifying devices on {mqtt_broker}..."
+if ! mosquitto_pub -h "{mqtt_broker}" -t "{mqtt_topic}" -m "$CUR_TS"; then
+    echo "Warning: could not notify devices; they will find the update on their next poll."
+fi
+"""
+    return f"""#!/bin/bash
+set -eo pipefail
+NO_UPLOAD=false
+if [ "$1" == "--no-upload" ]; then
+    NO_UPLOAD=true
+fi
+
+if [ "$NO_UPLOAD" = true ]; then
+    echo "Building Docker image locally..."
+else
+    echo "Building and redeploying to S3..."
+fi
+
+docker buildx build --platform {platform} -t {image_name} --output type=docker .
+
+if [ "$NO_UPLOAD" = true ]; then
+    echo "Build complete. Image '{image_name}' is available locally."
+    exit 0
+fi
+
+echo "Compressing image..."
+# Hash the compressed image as it is written; the hash goes into the signed version file
+IMAGE_SHA256=$(docker save {image_name} | zstd -q -T0 -19 --long=27 | tee {image_tar} | openssl dgst -sha256 -r)
+
+echo "Signing version file..."
+CUR_TS=$(date -u +"%Y-%m-%dT%H:%M:%SZ")
+IMAGE_ID=$(docker image inspect -f '{{{{.Id}}}}' {image_name})
+echo "last_build: \\"$CUR_TS\\"" > {VERSION_FILE}
+echo "image_id: \\"$IMAGE_ID\\"" >> {VERSION_FILE}
+echo "image_sha256: \\"${{IMAGE_SHA256%% *}}\\"" >> {VERSION_FILE}
+openssl dgst -sha256 -sign {PRIVATE_KEY} -out {VERSION_SIG} {VERSION_FILE}
+
+echo "Uploading to {s3_prefix}/"
+# Upload everything except version.yaml at once. version.yaml goes up last, so
+# devices never see a new version before the files it refers to are in place.
+PIDS=()
+aws s3 cp --only-show-errors {image_tar} {s3_prefix}/{image_tar} & PIDS+=($!)
+aws s3 cp --only-show-errors {VERSION_SIG} {s3_prefix}/{VERSION_SIG} & PIDS+=($!)
+for pid in "${{PIDS[@]}}"; do
+    if ! wait "$pid"; then
+        echo "ERROR: Upload to {s3_prefix}/ failed."
+        wait
+        exit 1
+    fi
+done
+aws s3 cp --only-show-errors {VERSION_FILE} {s3_prefix}/{VERSION_FILE}
+{notify_step}
+rm -f *.sha256 *.zst *.sig
+echo "Redeployment to S3 successful."
+"""
@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+
+import click
+from pathlib import Path
+
+from ..utils import console, load_yaml_cached
+from .devices import devices_list
+
+@click.command()
+@click.pass_context
+def status(ctx):
+    """Show current project configuration and status."""
+    from rich.table import Table
+    from rich.text import Text
+
+    console.print("[bold blue]📊 Project Status[/bold blue]")
+    
+    if not Path("iot-ota.yaml").exists():
+        console.print("[red]Not in an IoT OTA project directory. Run 'iot-ota init' to start.[/red]")
+        return
+    
+    project_config = load_yaml_cached("iot-ota.yaml")
+    
+    table = Table(title="Project Configuration (from iot-ota.yaml)")
+    table.add_column("Setting", style="cyan")
+    table.add_column("Value", style="green")
+    for key, value in project_config.items():
+        table.add_row(Text(key), Text(str(value)))
+    console.print(table)
+    
+    ctx.invoke(devices_list)
@@ -0,0 +1,425 @@
+#!/usr/bin/env python3
+
+"""Helpers shared by the iot-ota commands."""
+
+import functools
+import os
+import sys
+from collections import OrderedDict
+from pathlib import Path
+
+# rich, yaml and the other heavier modules are imported inside the functions
+# that need them, so that `iot-ota --help` and friends start quickly.
+
+@functools.lru_cache(maxsize=None)
+def _get_console():
+    """Return rich's shared console, set up once for the kind of output we're writing to."""
+    import rich
+    if not rich.get_console().is_terminal:
+        # Piped or CI output is plain text; skip rich's per-print syntax highlighting
+        rich.reconfigure(highlight=False)
+    return rich.get_console()
+
+class _LazyConsole:
+    """Stand-in for a rich Console that only imports rich on first use."""
+    def __getattr__(self, name):
+        return getattr(_get_console(), name)
+
+console = _LazyConsole()
+
+# Global config file location
+CONFIG_FILE = Path.home() / ".iot-ota-config.yaml"
+ANSIBLE_INVENTORY = "inventory.yaml"
+# Playbooks shipped with the package
+PLAYBOOK_DIR = Path(__file__).resolve().parent / "playbooks"
+
+def yaml_load(stream):
+    """Parse YAML safely, using the libyaml C parser when PyYAML was built with it."""
+    import yaml
+    return yaml.load(stream, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader))
+
+def yaml_dump(data, stream=None):
+    """Dump YAML in block style, using the libyaml C emitter when available.
+
+    Keys are written in insertion order rather than sorted.
+    """
+    import yaml
+    return yaml.dump(data, stream, Dumper=getattr(yaml, "CSafeDumper", yaml.SafeDumper),
+                     default_flow_style=False, sort_keys=False, allow_unicode=True)
+
+# Parsed YAML files, keyed by path: ((st_mtime_ns, st_size), data), least
+# recently used first
+_yaml_cache = OrderedDict()
+_YAML_CACHE_SIZE = 100
+
+def load_yaml_cached(path):
+    """Load a YAML file, reusing the parsed result while the file is unchanged."""
+    path = str(path)
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return {}
+    import copy
+    key = (st.st_mtime_ns, st.st_size)
+    cached = _yaml_cache.get(path)
+    if cached is None or cached[0] != key:
+        data = _read_json_sidecar(path, st)
+        if data is None:
+            with open(path, "r") as f:
+                data = yaml_load(f) or {}
+            _write_json_sidecar(path, data, st)
+        cached = _yaml_cache[path] = (key, data)
+        if len(_yaml_cache) > _YAML_CACHE_SIZE:
+            _yaml_cache.popitem(last=False)
+    _yaml_cache.move_to_end(path)
+    # Callers mutate what they get back, so never hand out the cached object
+    return copy.deepcopy(cached[1])
+
+# Each YAML file we load gets a "<file>.json" copy beside it, which later runs
+# read instead of parsing the YAML again. The copy records the YAML file's
+# (st_mtime_ns, st_size) and is only used while those match exactly, so a file
+# replaced by mv, cp -p or tar (which can keep an older mtime) is re-read.
+def _read_json_sidecar(path, st):
+    """Return the contents of path's JSON sidecar if it matches the YAML file, else None."""
+    import json
+    try:
+        with open(f"{path}.json", "r") as f:
+            sidecar = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(sidecar, dict) or sidecar.get("stat") != [st.st_mtime_ns, st.st_size]:
+        return None
+    return sidecar.get("data")
+
+def _has_only_str_keys(data):
+    """True if every mapping key in data is a string, so JSON gives back the same keys."""
+    if isinstance(data, dict):
+        return all(isinstance(k, str) and _has_only_str_keys(v) for k, v in data.items())
+    if isinstance(data, list):
+        return all(_has_only_str_keys(v) for v in data)
+    return True
+
+def _write_json_sidecar(path, data, st):
+    """Atomically write data as path's JSON sidecar; failures only cost a YAML parse later."""
+    import json
+    # JSON would turn keys like 1234 into "1234", so such files are always parsed as YAML
+    if not _has_only_str_keys(data):
+        return
+    sidecar = f"{path}.json"
+    tmp_path = f"{sidecar}.tmp"
+    try:
+        with open(tmp_path, "w") as f:
+            json.dump({"stat": [st.st_mtime_ns, st.st_size], "data": data}, f, separators=(",", ":"))
+        os.replace(tmp_path, sidecar)
+    except (OSError, TypeError, ValueError):
+        # Unwritable directory, or values JSON can't hold (e.g. YAML dates)
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
+def save_yaml(path, data):
+    """Write data to a YAML file atomically, so readers never see it half written."""
+    path = str(path)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        yaml_dump(data, f)
+    os.replace(tmp_path, path)
+    _write_json_sidecar(path, data, os.stat(path))
+    _yaml_cache.pop(path, None)
+
+class Config:
+    """Manages global configuration for the CLI tool."""
+    def __init__(self):
+        self._data = None
+
+    @property
+    def data(self):
+        # Read ~/.iot-ota-config.yaml on first access, not when the module is imported
+        if self._data is None:
+            self._data = self.load_config()
+        return self._data
+
+    def load_config(self):
+        return load_yaml_cached(CONFIG_FILE)
+
+    def save_config(self):
+        CONFIG_FILE.parent.mkdir(exist_ok=True)
+        save_yaml(CONFIG_FILE, self.data)
+
+    def get(self, key, default=None):
+        return self.data.get(key, default)
+
+    def set(self, key, value):
+        self.data[key] = value
+        self.save_config()
+
+config = Config()
+
+def list_project_files():
+    """Return the set of names in the current directory, from a single listing."""
+    with os.scandir(".") as entries:
+        return {entry.name for entry in entries}
+
+@functools.lru_cache(maxsize=None)
+def get_project_dir_name():
+    """Name of the project directory, as recorded by init or else taken from the cwd."""
+    return load_yaml_cached("iot-ota.yaml").get("project_dir_name") or os.path.basename(os.getcwd())
+
+@functools.lru_cache(maxsize=None)
+def _ansible_playbook_bin():
+    """Path of the ansible-playbook executable, or None if it is not on PATH."""
+    import shutil
+    return shutil.which("ansible-playbook")
+
+# Hosts Ansible works on at once. Provisioning is network bound, so go well
+# past Ansible's own default of 5.
+ANSIBLE_FORKS = max(5, (os.cpu_count() or 1) * 4)
+
+# Settings for every playbook run, unless the environment or ansible.cfg sets
+# them. Pipelining sends each module over the already open SSH connection
+# instead of copying it to the device first; none of our playbooks use sudo,
+# so requiretty can't get in the way.
+ANSIBLE_ENV_DEFAULTS = {
+    "ANSIBLE_FORKS": str(ANSIBLE_FORKS),
+    "ANSIBLE_PIPELINING": "True",
+}
+# Where each of those settings can be given in ansible.cfg, as (section, key)
+_ANSIBLE_CFG_OPTIONS = {
+    "ANSIBLE_FORKS": (("defaults", "forks"),),
+    "ANSIBLE_PIPELINING": (("defaults", "pipelining"), ("connection", "pipelining"),
+                           ("ssh_connection", "pipelining")),
+}
+
+def _ansible_cfg_path():
+    """The ansible.cfg Ansible would read, searched in its own order, or None."""
+    candidates = [os.environ.get("ANSIBLE_CONFIG"), "ansible.cfg",
+                  os.path.expanduser("~/.ansible.cfg"), "/etc/ansible/ansible.cfg"]
+    for path in candidates:
+        if path and os.path.isdir(path):
+            path = os.path.join(path, "ansible.cfg")
+        if path and os.path.isfile(path):
+            return path
+    return None
+
+def _ansible_env():
+    """The environment for ansible-playbook: ours plus ANSIBLE_ENV_DEFAULTS not set elsewhere."""
+    import configparser
+    env = dict(ANSIBLE_ENV_DEFAULTS)
+    cfg_path = _ansible_cfg_path()
+    if cfg_path:
+        cfg = configparser.ConfigParser(interpolation=None, strict=False)
+        try:
+            cfg.read(cfg_path)
+        except configparser.Error:
+            pass
+        for name, options in _ANSIBLE_CFG_OPTIONS.items():
+            if any(cfg.has_option(section, key) for section, key in options):
+                del env[name]
+    env.update(os.environ)
+    return env
+
+def _stream_playbook(command, lock, env=None):
+    """Run an ansible-playbook command, echoing its output under lock, and return its exit code."""
+    import subprocess
+    # Stream the playbook log as it runs instead of buffering all of it
+    process = subprocess.Popen(
+        command,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        bufsize=1,
+        env=env
+    )
+    for line in process.stdout:
+        with lock:
+            # Ansible output is full of "[host]" brackets, so don't parse it as markup
+            console.print(line.rstrip(), style="dim", markup=False)
+    return process.wait()
+
+def run_ansible_playbook(playbook_file, extra_vars=None, forks=None, per_host=False):
+    """Run an Ansible playbook, streaming its output, and return its exit code.
+
+    With per_host, a separate ansible-playbook is started for each device
+    (up to forks at a time), so one slow host doesn't hold up the others.
+    """
+    import threading
+
+    hosts = load_inventory().get("edge_devices", {}).get("hosts")
+    if not hosts:
+        console.print("[red]No devices configured. Use 'iot-ota devices add' first.[/red]")
+        return 1
+
+    ansible_playbook = _ansible_playbook_bin()
+    if ansible_playbook is None:
+        console.print("[red]Error: 'ansible-playbook' command not found.[/red]")
+        console.print("[yellow]Please ensure Ansible is installed and in your system's PATH.[/yellow]")
+        return 1
+    
+    command = [ansible_playbook, "-i", ANSIBLE_INVENTORY, playbook_file, "-v"]
+    if extra_vars:
+        import json
+        # ansible-playbook takes JSON extra vars directly
+        command.extend(["--extra-vars", json.dumps(extra_vars, separators=(",", ":"))])
+    env = _ansible_env()
+    lock = threading.Lock()
+
+    try:
+        console.print(f"Running Ansible playbook: {playbook_file}...")
+        if per_host:
+            from concurrent.futures import ThreadPoolExecutor
+            with ThreadPoolExecutor(max_workers=min(forks or ANSIBLE_FORKS, len(hosts))) as pool:
+                returncodes = list(pool.map(
+                    lambda host: _stream_playbook(command + ["--limit", str(host)], lock, env), hosts))
+            returncode = next((rc for rc in returncodes if rc != 0), 0)
+        else:
+            # An explicit --forks overrides ansible.cfg; otherwise ANSIBLE_FORKS applies
+            if forks:
+                command += ["-f", str(forks)]
+            returncode = _stream_playbook(command, lock, env)
+        
+        if returncode != 0:
+            console.print(f"[red]Ansible command failed (return code: {returncode}). See output above for details.[/red]")
+        return returncode
+            
+    except Exception as e:
+        console.print(f"[red]An error occurred while running Ansible: {e}[/red]")
+        return 1
+
+def _run_ansible_playbook(playbook_file, extra_vars=None, forks=None, per_host=False):
+    """Internal function to run an Ansible playbook, exiting if it fails."""
+    if run_ansible_playbook(playbook_file, extra_vars, forks, per_host) != 0:
+        sys.exit(1)
+    return True
+
+def create_ota_poll_script():
+    """Write ota_poll.sh for projects initialized before the script existed."""
+    if os.path.exists("ota_poll.sh") or not os.path.exists("iot-ota.yaml"):
+        return
+    from .commands.init import _render_ota_poll, _mqtt_topic
+    console.print("[yellow]ota_poll.sh not found; generating it from iot-ota.yaml.[/yellow]")
+    mqtt_broker = load_yaml_cached("iot-ota.yaml").get("mqtt_broker", "")
+    with open("ota_poll.sh", "w") as f:
+        f.write(_render_ota_poll(mqtt_broker, _mqtt_topic(get_project_dir_name())))
+    os.chmod("ota_poll.sh", 0o755)
+
+def run_setup_playbook():
+    """Write the device setup playbook and run it, returning Ansible's exit code."""
+    create_setup_playbook()
+    create_ota_poll_script()
+    return run_ansible_playbook("setup_devices.yaml")
+
+def load_inventory():
+    """Load the Ansible inventory file."""
+    return load_yaml_cached(ANSIBLE_INVENTORY)
+
+def save_inventory(inventory):
+    """Save the Ansible inventory file."""
+    save_yaml(ANSIBLE_INVENTORY, inventory)
+
+# Device setup playbook; formatted with the local project directory name and
+# the zstd check tasks (or nothing)
+SETUP_PLAYBOOK = """---
+- name: Deploy OTA Agent and Setup Auto-Update Cron Job
+  hosts: edge_devices
+  gather_facts: no
+  become: no # Assumes user has docker permissions
+  tasks:
+    - name: Get project directory name from localhost
+      delegate_to: localhost
+      run_once: true
+      set_fact:
+        project_dir_name: "{project_dir_name}"
+
+{zstd_check}    - name: Ensure project directory exists on device
+      ansible.builtin.file:
+        path: "~/{{{{ project_dir_name }}}}"
+        state: directory
+        mode: '0755'
+
+    - name: Copy public key for signature verification
+      ansible.builtin.copy:
+        src: ota_public.pem
+        dest: "~/{{{{ project_dir_name }}}}/ota_public.pem"
+        mode: '0644'
+
+    - name: Copy the OTA deployment script to the device
+      ansible.builtin.copy:
+        src: edge_deploy.sh
+        dest: "~/edge_deploy.sh"
+        mode: '0755'
+
+    - name: Copy the OTA polling script to the device
+      ansible.builtin.copy:
+        src: ota_poll.sh
+        dest: "~/ota_poll.sh"
+        mode: '0755'
+      register: poll_script
+
+    # A running poller never exits by itself and holds the lock, so stop it.
+    # Its children don't hold the lock, so cron starts the new script within a minute
+    - name: Restart the OTA polling script if it changed
+      ansible.builtin.shell: "pkill -f '[o]ta_poll.sh' || true"
+      when: poll_script.changed
+
+    - name: Run the OTA deployment script
+      ansible.builtin.shell:
+        cmd: "cd ~ && ./edge_deploy.sh"
+      register: deployment_result
+      changed_when: "'New version found' in deployment_result.stdout"
+
+    - name: Show deployment output
+      ansible.builtin.debug:
+        msg: "{{{{ deployment_result.stdout_lines }}}}"
+
+    - name: Show deployment errors (if any)
+      ansible.builtin.debug:
+        msg: "{{{{ deployment_result.stderr_lines }}}}"
+      when: deployment_result.stderr | length > 0
+
+    - name: Create cron job that keeps the OTA update poller running
+      ansible.builtin.cron:
+        name: "IoT OTA Auto Update Check"
+        minute: "*"
+        job: "cd ~ && ./ota_poll.sh >> ~/ota_update.log 2>&1"
+        state: present
+        user: "{{{{ ansible_user }}}}"
+
+    - name: Remove the log rotation cron job installed by older versions
+      ansible.builtin.cron:
+        name: "IoT OTA Log Rotation"
+        state: absent
+        user: "{{{{ ansible_user }}}}"
+"""
+
+# Setup playbook tasks for projects whose edge_deploy.sh unpacks .tar.zst images
+ZSTD_CHECK_TASKS = """    - name: Check that zstd is installed
+      ansible.builtin.shell: "command -v zstd"
+      register: zstd_check
+      changed_when: false
+      failed_when: false
+
+    - name: Stop if zstd is missing
+      ansible.builtin.fail:
+        msg: "zstd is needed to unpack updates. Install it with 'sudo apt-get install zstd'."
+      when: zstd_check.rc != 0
+
+"""
+
+def _edge_deploy_uses_zstd():
+    """True if the project's edge_deploy.sh expects zstd on the device."""
+    try:
+        return ".tar.zst" in Path("edge_deploy.sh").read_text()
+    except OSError:
+        return False
+
+def create_setup_playbook():
+    """Create the Ansible playbook for device setup with cron job for auto-updates."""
+    # Projects initialized before images were compressed still ship a plain .tar
+    zstd_check = ZSTD_CHECK_TASKS if _edge_deploy_uses_zstd() else ""
+    playbook_content = SETUP_PLAYBOOK.format(project_dir_name=get_project_dir_name(),
+                                             zstd_check=zstd_check).encode()
+    # Leave the file (and its mtime) alone when nothing changed
+    playbook = Path("setup_devices.yaml")
+    if not playbook.exists() or playbook.read_bytes() != playbook_content:
+        playbook.write_bytes(playbook_content)
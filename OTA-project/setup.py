@@ -8,6 +8,7 @@ setup(
     description="CLI tool for IoT Over-The-Air updates",
     author="IOT-Project",
     packages=find_packages(),
+    package_data={"iot_ota_cli": ["playbooks/*.yaml"]},
     install_requires=[
         "click>=8.0.0",
         "pyyaml>=6.0",